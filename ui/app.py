@@ -1,136 +1,308 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
 from datetime import timedelta
+import io
+import re
 import requests
 
-def load_data(file):
-    df = pd.read_csv(file)
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+DATE_FORMATS = ['%m/%d/%y', '%m/%d/%Y', '%Y-%m-%d', '%d/%m/%Y']
+CHUNK_SIZE = 100_000
+NA_VALUES = ['', 'NA']
+DATE_SEP_RE = re.compile(r'[-/]')
+DIGIT_RE = re.compile(r'\d')
+MAX_PLOT_POINTS = 1000
+
+def _infer_format(sample, preferred=None):
+    sample = pd.Series(pd.Series(sample).dropna().astype(str).unique())
+    if sample.empty:
+        return preferred
+    candidates = [preferred] + DATE_FORMATS if preferred is not None else DATE_FORMATS
+    for fmt in candidates:
+        try:
+            pd.to_datetime(sample, format=fmt, errors='raise')
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+def _parse_dates(values, fmt):
+    uniq = values.dropna().unique()
+    if len(uniq) == 0:
+        return pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    parsed = np.asarray(pd.to_datetime(uniq, format=fmt, errors='coerce', cache=True), dtype='datetime64[ns]')
+    missing = np.isnat(parsed)
+    if missing.any():
+        parsed[missing] = pd.to_datetime(uniq[missing], format='mixed', errors='coerce')
+    lookup = pd.Series(parsed, index=uniq)
+    return values.map(lookup)
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _cum_to_daily_nb(arr):
+        daily = np.empty_like(arr)
+        for i in range(len(arr)):
+            d = arr[i] - arr[i - 1] if i > 0 else arr[i]
+            daily[i] = d if d > 0 else 0
+        return daily
+
+def _cum_to_daily(arr):
+    if numba is not None:
+        return _cum_to_daily_nb(arr)
+    daily = np.empty_like(arr)
+    daily[:1] = arr[:1]
+    np.subtract(arr[1:], arr[:-1], out=daily[1:])
+    np.fmax(daily, 0, out=daily)
+    return daily
+
+def _downcast_counts(values):
+    values = np.asarray(values)
+    if values.dtype.kind == 'f':
+        if np.isinf(values).any():
+            raise ValueError("Count columns contain infinite values. Please ensure they contain finite numbers")
+        values = np.nan_to_num(values, nan=0)
+    if values.size == 0:
+        return values.astype(np.int32)
+    for dtype in [np.int32, np.int64]:
+        bound = 2 ** (np.iinfo(dtype).bits - 1)
+        if values.min() >= -bound and values.max() < bound:
+            return values.astype(dtype)
+    raise ValueError("Count columns contain values too large to store. Please check your data")
+
+def _read_csv_chunks(file_bytes, usecols, dtype, engine):
+    if engine == 'pyarrow':
+        column_types = {col: pa.float64() if col in dtype else pa.string() for col in usecols}
+        convert_options = pacsv.ConvertOptions(include_columns=usecols, column_types=column_types,
+                                               null_values=NA_VALUES, strings_can_be_null=True)
+        reader = pacsv.open_csv(io.BytesIO(file_bytes), read_options=pacsv.ReadOptions(use_threads=True),
+                                convert_options=convert_options)
+        return (batch.to_pandas() for batch in reader)
+    return pd.read_csv(io.BytesIO(file_bytes), usecols=usecols, dtype=dtype, na_values=NA_VALUES,
+                       chunksize=CHUNK_SIZE, low_memory=True)
+
+class _CsvReadError(Exception):
+    pass
+
+def _guard_reader(file_bytes, usecols, dtype, engine):
+    read_errors = (ValueError, pa.ArrowKeyError) if pa is not None else (ValueError,)
+    reader = None
+    while True:
+        try:
+            if reader is None:
+                reader = iter(_read_csv_chunks(file_bytes, usecols, dtype, engine))
+            chunk = next(reader)
+        except StopIteration:
+            return
+        except read_errors as e:
+            raise _CsvReadError() from e
+        yield chunk
+
+def _reduce_csv(file_bytes, usecols, value_cols, reduce):
+    engines = ['pyarrow', 'c'] if pacsv is not None else ['c']
+    typed = {col: 'float64' for col in value_cols}
+    error = None
+    for engine in engines:
+        for dtype in [typed, {}]:
+            try:
+                return reduce(_guard_reader(file_bytes, usecols, dtype, engine))
+            except _CsvReadError as e:
+                error = e.__cause__
+    raise error
+
+def _sum_wide_chunks(reader, date_pattern_cols):
+    totals = np.zeros(len(date_pattern_cols))
+    for chunk in reader:
+        chunk = chunk[date_pattern_cols]
+        non_numeric = [col for col in date_pattern_cols if not pd.api.types.is_numeric_dtype(chunk[col])]
+        if non_numeric:
+            chunk = chunk.copy()
+            chunk[non_numeric] = chunk[non_numeric].apply(pd.to_numeric, errors='coerce')
+        totals += np.nansum(chunk.to_numpy(dtype=np.float64), axis=0)
+    return totals
+
+def _reduce_long_chunks(reader, rename_map):
+    fmt = None
+    has_dates = False
+    has_cases = False
+    daily_parts = []
+    for chunk in reader:
+        chunk.rename(columns=rename_map, inplace=True)
+        fmt = _infer_format(chunk['date'], preferred=fmt)
+        chunk['date'] = _parse_dates(chunk['date'], fmt)
+        
+        for col in ['cases', 'deaths', 'recovered']:
+            if col not in chunk.columns:
+                chunk[col] = 0
+            elif not pd.api.types.is_numeric_dtype(chunk[col]):
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        
+        has_dates = has_dates or chunk['date'].notna().any()
+        has_cases = has_cases or chunk['cases'].notna().any()
+        
+        chunk = chunk.dropna(subset=['date', 'cases'])
+        daily_parts.append(chunk.groupby('date')[['cases', 'deaths', 'recovered']].sum())
+    return daily_parts, has_dates, has_cases
+
+@st.cache_data(ttl=3600)
+def load_data(file_bytes):
+    columns = pd.read_csv(io.BytesIO(file_bytes), nrows=0).columns
     
-    date_pattern_cols = [col for col in df.columns if any(char in str(col) for char in ['/', '-']) and any(char.isdigit() for char in str(col))]
+    clean_cols = [str(col).lower().strip() for col in columns]
+    date_pattern_cols = [col for col in columns if DATE_SEP_RE.search(str(col)) and DIGIT_RE.search(str(col))]
     
-    if date_pattern_cols and 'date' not in df.columns.str.lower():
-        non_date_cols = [col for col in df.columns if col not in date_pattern_cols]
-        df_melted = df.melt(id_vars=non_date_cols, value_vars=date_pattern_cols, 
-                           var_name='date_str', value_name='cases')
-        df_melted['cases'] = pd.to_numeric(df_melted['cases'], errors='coerce').fillna(0)
-        df_melted['date'] = pd.to_datetime(df_melted['date_str'], errors='coerce')
-        df = df_melted.groupby('date', as_index=False).agg({'cases': 'sum'})
-        df = df.dropna(subset=['date']).reset_index(drop=True)
-        df = df.sort_values('date').reset_index(drop=True)
+    if date_pattern_cols and 'date' not in clean_cols:
+        totals = _reduce_csv(file_bytes, date_pattern_cols, date_pattern_cols,
+                             lambda reader: _sum_wide_chunks(reader, date_pattern_cols))
+        fmt = _infer_format(date_pattern_cols)
+        dates = pd.to_datetime(date_pattern_cols, format=fmt, errors='coerce')
+        mask = dates.notna()
+        df = pd.DataFrame({'date': dates[mask], 'cases': totals[mask]})
+        df = df.groupby('date', sort=True, as_index=False)['cases'].sum()
         
         if len(df) > 1 and df['cases'].iloc[-1] > df['cases'].iloc[0] * 10:
-            df['cases'] = df['cases'].diff().fillna(df['cases'].iloc[0]).clip(lower=0)
+            df['cases'] = _cum_to_daily(df['cases'].to_numpy())
         
         df['deaths'] = 0
         df['recovered'] = 0
         
     else:
-        df.columns = df.columns.str.lower().str.strip()
         required_cols = ['date', 'cases']
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = [col for col in required_cols if col not in clean_cols]
         
         if missing_cols:
-            raise ValueError(f"Missing required columns: {', '.join(missing_cols)}. Found columns: {', '.join(df.columns.tolist()[:10])}...")
+            raise ValueError(f"Missing required columns: {', '.join(missing_cols)}. Found columns: {', '.join(clean_cols[:10])}...")
         
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        if df['date'].isna().all():
-            raise ValueError("Could not parse date column. Please ensure dates are in format YYYY-MM-DD")
+        rename_map = {orig: clean for orig, clean in zip(columns, clean_cols) if clean in ['date', 'cases', 'deaths', 'recovered']}
+        value_cols = [orig for orig, clean in rename_map.items() if clean != 'date']
+        daily_parts, has_dates, has_cases = _reduce_csv(file_bytes, list(rename_map), value_cols,
+                                                        lambda reader: _reduce_long_chunks(reader, rename_map))
         
-        df['cases'] = pd.to_numeric(df['cases'], errors='coerce')
-        if df['cases'].isna().all():
+        if not has_dates:
+            raise ValueError("Could not parse date column. Please ensure dates are in format YYYY-MM-DD")
+        if not has_cases:
             raise ValueError("Could not parse cases column. Please ensure it contains numbers")
         
-        if 'deaths' not in df.columns:
-            df['deaths'] = 0
-        else:
-            df['deaths'] = pd.to_numeric(df['deaths'], errors='coerce').fillna(0)
-        
-        if 'recovered' not in df.columns:
-            df['recovered'] = 0
-        else:
-            df['recovered'] = pd.to_numeric(df['recovered'], errors='coerce').fillna(0)
-        
-        df = df.dropna(subset=['date', 'cases']).reset_index(drop=True)
+        df = pd.concat(daily_parts).groupby(level='date').sum().reset_index()
     
     if len(df) == 0:
         raise ValueError("No valid data rows found after cleaning")
     
-    df['cases'] = df['cases'].astype(int)
-    df['deaths'] = df['deaths'].astype(int)
-    df['recovered'] = df['recovered'].astype(int)
+    for col in ['cases', 'deaths', 'recovered']:
+        df[col] = _downcast_counts(df[col].to_numpy())
+    
+    return df
+
+@st.cache_resource
+def get_session():
+    return requests.Session()
+
+@st.cache_data(ttl=3600)
+def fetch_live_data(url="https://disease.sh/v3/covid-19/historical/all?lastdays=all"):
+    response = get_session().get(url, timeout=10)
+    response.raise_for_status()
+    data = orjson.loads(response.content) if orjson is not None else response.json()
+    
+    cases_dict = data.get('cases') if isinstance(data, dict) else None
+    if not isinstance(cases_dict, dict) or not cases_dict:
+        raise ValueError("API response did not contain any case data")
+    deaths_dict = data.get('deaths') or {}
+    recovered_dict = data.get('recovered') or {}
+    
+    n = len(cases_dict)
+    df = pd.DataFrame({
+        'date': pd.to_datetime(list(cases_dict), format='%m/%d/%y'),
+        'cases': np.fromiter(cases_dict.values(), dtype=np.int64, count=n),
+        'deaths': np.fromiter((deaths_dict.get(d, 0) for d in cases_dict), dtype=np.int64, count=n),
+        'recovered': np.fromiter((recovered_dict.get(d, 0) for d in cases_dict), dtype=np.int64, count=n)
+    })
+    
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date').reset_index(drop=True)
+    df['cases'] = _downcast_counts(_cum_to_daily(df['cases'].to_numpy()))
+    df['deaths'] = _downcast_counts(_cum_to_daily(df['deaths'].to_numpy()))
+    df['recovered'] = _downcast_counts(_cum_to_daily(df['recovered'].to_numpy()))
     
     return df
 
 def create_sample_data():
     try:
-        url = "https://disease.sh/v3/covid-19/historical/all?lastdays=all"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        cases_dict = data.get('cases', {})
-        deaths_dict = data.get('deaths', {})
-        recovered_dict = data.get('recovered', {})
-        
-        df = pd.DataFrame(list(cases_dict.items()), columns=['date', 'cases'])
-        df['date'] = pd.to_datetime(df['date'])
-        
-        if deaths_dict:
-            deaths_df = pd.DataFrame(list(deaths_dict.items()), columns=['date', 'deaths'])
-            deaths_df['date'] = pd.to_datetime(deaths_df['date'])
-            df = df.merge(deaths_df, on='date', how='left')
-            df['deaths'] = df['deaths'].fillna(0).astype(int)
-        else:
-            df['deaths'] = 0
-        
-        if recovered_dict:
-            recovered_df = pd.DataFrame(list(recovered_dict.items()), columns=['date', 'recovered'])
-            recovered_df['date'] = pd.to_datetime(recovered_df['date'])
-            df = df.merge(recovered_df, on='date', how='left')
-            df['recovered'] = df['recovered'].fillna(0).astype(int)
-        else:
-            df['recovered'] = 0
-        
-        df = df.sort_values('date').reset_index(drop=True)
-        df['cases'] = df['cases'].diff().fillna(df['cases'].iloc[0]).astype(int)
-        df['cases'] = df['cases'].clip(lower=0)
-        
-        if 'deaths' in df.columns:
-            df['deaths'] = df['deaths'].diff().fillna(df['deaths'].iloc[0]).astype(int)
-            df['deaths'] = df['deaths'].clip(lower=0)
-        
-        if 'recovered' in df.columns:
-            df['recovered'] = df['recovered'].diff().fillna(df['recovered'].iloc[0]).astype(int)
-            df['recovered'] = df['recovered'].clip(lower=0)
-        
-        return df
+        return fetch_live_data()
     except Exception as e:
         st.error(f"Couldn't fetch live data: {str(e)}. Using fallback data.")
         dates = pd.date_range(start='2020-01-01', end='2023-12-31', freq='D')
-        cases = np.random.randint(100, 1000, len(dates)) + np.sin(np.arange(len(dates)) * 0.1) * 200
-        deaths = cases * 0.02 + np.random.randint(0, 10, len(dates))
-        recovered = cases * 0.8 + np.random.randint(0, 50, len(dates))
+        n = len(dates)
+        rng = np.random.default_rng()
+        values = rng.integers([[100], [0], [0]], [[1000], [10], [50]], size=(3, n)).astype(np.float32)
+        values[0] += np.sin(np.arange(n, dtype=np.float32) * 0.1) * 200
+        values[1] += values[0] * 0.02
+        values[2] += values[0] * 0.8
+        values = values.astype(np.int32)
         
         df = pd.DataFrame({
             'date': dates,
-            'cases': cases.astype(int),
-            'deaths': deaths.astype(int),
-            'recovered': recovered.astype(int)
+            'cases': values[0],
+            'deaths': values[1],
+            'recovered': values[2]
         })
         return df
 
+@st.cache_data(ttl=3600)
+def compute_period_stats(dates, cases):
+    dates = pd.Series(dates)
+    cases = pd.Series(cases)
+    
+    year_stats = cases.groupby(dates.dt.year).agg(['sum', 'mean', 'max']).reset_index()
+    year_stats.columns = ['Year', 'Total Cases', 'Average Daily Cases', 'Peak Cases']
+    
+    quarter_stats = cases.groupby(dates.dt.to_period('Q')).agg(['sum', 'mean', 'max']).reset_index()
+    quarter_stats.columns = ['Year-Quarter', 'Total Cases', 'Average Daily Cases', 'Peak Cases']
+    quarter_stats['Year-Quarter'] = quarter_stats['Year-Quarter'].dt.strftime('%Y Q%q')
+    
+    return year_stats, quarter_stats
+
+def _downsample(x, y, n=MAX_PLOT_POINTS):
+    if len(x) <= n:
+        return x, y
+    idx = np.linspace(0, len(x) - 1, n).astype(int)
+    return x[idx], y[idx]
+
+def get_figure(key, figsize):
+    if key not in st.session_state:
+        fig = Figure(figsize=figsize)
+        fig.add_subplot()
+        st.session_state[key] = fig
+    fig = st.session_state[key]
+    ax = fig.axes[0]
+    ax.clear()
+    return fig, ax
+
 def predict_cases(df, days=7):
     if len(df) < 7:
         return None
     
-    last_week_avg = df['cases'].tail(7).mean()
-    predictions = []
-    
-    for i in range(days):
-        pred = last_week_avg * (1 + 0.05 * np.sin(i * 0.1))
-        predictions.append(int(pred))
+    last_week_avg = df['cases'].to_numpy()[-7:].mean()
+    i = np.arange(days)
+    predictions = _downcast_counts((last_week_avg * (1 + 0.05 * np.sin(i * 0.1))).astype(np.int64))
     
     future_dates = pd.date_range(start=df['date'].max() + timedelta(days=1), periods=days, freq='D')
     return pd.DataFrame({
@@ -160,7 +332,7 @@ if st.button("Load live data from API"):
 if uploaded_file is not None:
     with st.spinner("Loading and analyzing your data..."):
         try:
-            st.session_state.data = load_data(uploaded_file)
+            st.session_state.data = load_data(uploaded_file.getvalue())
         except Exception as e:
             st.error(f"Error loading file: {str(e)}")
             st.session_state.data = None
@@ -175,15 +347,15 @@ if st.session_state.data is not None:
         st.header("Daily Cases Over Time")
         
         with st.spinner("Generating graph..."):
-            fig, ax = plt.subplots(figsize=(10, 5))
-            ax.plot(df['date'], df['cases'], label='Daily Cases', color='blue')
+            fig, ax = get_figure('fig_daily', figsize=(10, 5))
+            ax.plot(*_downsample(df['date'].to_numpy(), df['cases'].to_numpy()), label='Daily Cases', color='blue')
             ax.set_xlabel('Date')
             ax.set_ylabel('Number of Cases')
             ax.set_title('Daily Covid-19 Cases Over Time')
             ax.legend()
             ax.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-            plt.tight_layout()
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.tight_layout()
             st.pyplot(fig)
         
         st.subheader("Quick Stats")
@@ -197,35 +369,28 @@ if st.session_state.data is not None:
         
         st.header("Year and Quarter Analysis")
         
-        df['year'] = df['date'].dt.year
-        df['quarter'] = df['date'].dt.quarter
-        df['year_quarter'] = df['year'].astype(str) + ' Q' + df['quarter'].astype(str)
+        year_stats, quarter_stats = compute_period_stats(df['date'].to_numpy(), df['cases'].to_numpy())
         
         st.subheader("Year-wise Cases")
-        year_stats = df.groupby('year')['cases'].agg(['sum', 'mean', 'max']).reset_index()
-        year_stats.columns = ['Year', 'Total Cases', 'Average Daily Cases', 'Peak Cases']
         
         with st.spinner("Generating year-wise chart..."):
-            fig_year, ax_year = plt.subplots(figsize=(10, 5))
+            fig_year, ax_year = get_figure('fig_year', figsize=(10, 5))
             ax_year.bar(year_stats['Year'], year_stats['Total Cases'], color='steelblue')
             ax_year.set_xlabel('Year')
             ax_year.set_ylabel('Total Cases')
             ax_year.set_title('Total Cases by Year')
             ax_year.grid(True, alpha=0.3, axis='y')
-            plt.xticks(year_stats['Year'], rotation=0)
-            plt.tight_layout()
+            ax_year.set_xticks(year_stats['Year'])
+            fig_year.tight_layout()
             st.pyplot(fig_year)
         
         st.write("Year-wise breakdown:")
-        st.write(year_stats)
+        st.dataframe(year_stats, use_container_width=True)
         
         st.subheader("Quarter-wise Cases")
-        quarter_stats = df.groupby('year_quarter')['cases'].agg(['sum', 'mean', 'max']).reset_index()
-        quarter_stats.columns = ['Year-Quarter', 'Total Cases', 'Average Daily Cases', 'Peak Cases']
-        quarter_stats = quarter_stats.sort_values('Year-Quarter')
         
         with st.spinner("Generating quarter-wise chart..."):
-            fig_quarter, ax_quarter = plt.subplots(figsize=(12, 5))
+            fig_quarter, ax_quarter = get_figure('fig_quarter', figsize=(12, 5))
             ax_quarter.bar(range(len(quarter_stats)), quarter_stats['Total Cases'], color='coral')
             ax_quarter.set_xlabel('Quarter')
             ax_quarter.set_ylabel('Total Cases')
@@ -233,15 +398,15 @@ if st.session_state.data is not None:
             ax_quarter.set_xticks(range(len(quarter_stats)))
             ax_quarter.set_xticklabels(quarter_stats['Year-Quarter'], rotation=45, ha='right')
             ax_quarter.grid(True, alpha=0.3, axis='y')
-            plt.tight_layout()
+            fig_quarter.tight_layout()
             st.pyplot(fig_quarter)
         
         st.write("Quarter-wise breakdown:")
-        st.write(quarter_stats)
+        st.dataframe(quarter_stats, use_container_width=True)
         
         st.subheader("Data Preview")
         st.write("First few rows of your data:")
-        st.write(df[['date', 'cases', 'deaths', 'recovered']].head(10))
+        st.dataframe(df.head(10)[['date', 'cases', 'deaths', 'recovered']], use_container_width=True)
         
         st.header("Predictions for Next 30 Days")
         
@@ -249,20 +414,20 @@ if st.session_state.data is not None:
             predictions = predict_cases(df, days=30)
             
             if predictions is not None:
-                fig2, ax2 = plt.subplots(figsize=(10, 5))
-                ax2.plot(df['date'].tail(30), df['cases'].tail(30), label='Historical Cases', color='blue')
-                ax2.plot(predictions['date'], predictions['predicted_cases'], label='Predicted Cases', color='red', linestyle='--')
+                fig2, ax2 = get_figure('fig_predictions', figsize=(10, 5))
+                ax2.plot(*_downsample(df['date'].to_numpy()[-30:], df['cases'].to_numpy()[-30:]), label='Historical Cases', color='blue')
+                ax2.plot(*_downsample(predictions['date'].to_numpy(), predictions['predicted_cases'].to_numpy()), label='Predicted Cases', color='red', linestyle='--')
                 ax2.set_xlabel('Date')
                 ax2.set_ylabel('Number of Cases')
                 ax2.set_title('Covid-19 Cases: Historical vs Predicted (Next 30 Days)')
                 ax2.legend()
                 ax2.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                plt.tight_layout()
+                ax2.tick_params(axis='x', labelrotation=45)
+                fig2.tight_layout()
                 st.pyplot(fig2)
                 
                 st.write("Prediction details:")
-                st.write(predictions)
+                st.dataframe(predictions, use_container_width=True)
             else:
                 st.warning("Not enough data to make predictions. Need at least 7 days of data.")
 else: